@@ -14,13 +14,34 @@ USO:
   python limpiar_duplicados_tidal.py
 """
 
+import argparse
+import hashlib
 import re
+import sqlite3
 import time
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
 
-# Pausa entre eliminaciones para no saturar la API
+from tidal_http import TokenBucket, call_api, tune_http_session
+
+# Pausa mínima entre eliminaciones (segundos), contando las de todos los
+# hilos. Sube este valor si ves errores de rate limit.
 RATE_LIMIT_DELAY = 0.3
 
+# Ritmo máximo de eliminaciones, en peticiones por segundo, compartido por
+# todos los hilos. Por defecto 1 / RATE_LIMIT_DELAY (3,3/s): el mismo techo
+# que eliminar una canción tras otra. Puedes subirlo si tu cuenta lo tolera;
+# ante un 429 se pausa a todos los hilos a la vez.
+DELETE_RATE = 1 / RATE_LIMIT_DELAY
+
+# Eliminaciones simultáneas. Los hilos solo solapan la latencia de red: el
+# ritmo lo marca DELETE_RATE, no el número de hilos.
+DELETE_WORKERS = 6
+
+# Páginas de My Tracks descargadas en paralelo una vez conocido el total
+FETCH_WORKERS = 8
+
 # Cuántos tracks traer por página
 PAGE_SIZE = 100
 
@@ -31,11 +52,34 @@ MAX_TRACKS = 50_000
 # Archivo de log con lo que se eliminó
 LOG_ELIMINADOS = "tidal_duplicados_eliminados.txt"
 
+# Caché en disco de la normalización por track (se reutiliza entre ejecuciones)
+NORM_CACHE_PATH = Path.home() / ".cache" / "tidal-dedup" / "norm.sqlite"
+
+# Con --fuzzy, dos títulos del mismo artista casi iguales ("dont stop me now" /
+# "don t stop me now") cuentan como duplicados. Solo se comparan títulos
+# normalizados de al menos FUZZY_MIN_LENGTH caracteres, y se admiten hasta
+# max(1, longitud // 10) ediciones: en títulos cortos una letra ya cambia
+# la canción ("help" / "hello"). Los números tienen que coincidir exactamente:
+# "symphony no 5" y "symphony no 6" son obras distintas.
+FUZZY_MIN_LENGTH = 8
+
 try:
     import tidalapi
 except ImportError:
     tidalapi = None
 
+# orjson (opcional) decodifica las páginas de la API bastante más rápido
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# rapidfuzz (opcional) solo se usa con --fuzzy
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    Levenshtein = None
+
 # Palabras y patrones que se ignoran al comparar títulos
 # (versiones alternativas de la misma canción)
 NOISE_PATTERNS = [
@@ -61,7 +105,31 @@ NOISE_PATTERNS = [
     r"\b\d+(st|nd|rd|th)\b",  # 25th, 1st, etc.
 ]
 
-NOISE_RE = re.compile("|".join(NOISE_PATTERNS), re.IGNORECASE)
+# Todas las palabras que forman los NOISE_PATTERNS de texto (mantener en
+# sincronía). Un título solo con letras ASCII y sin ninguna de estas palabras
+# no necesita pasar por la regex en normalize(); años y ordinales llevan
+# dígitos y nunca toman ese atajo.
+_NOISE_WORDS = frozenset(
+    "remaster remastered anniversary deluxe bonus album single version radio "
+    "edit original explicit clean live acoustic mono stereo digital revisited "
+    "expanded special edition".split()
+)
+
+# Una sola pasada para normalize(): (contenido), [contenido], palabras de ruido
+# y cualquier símbolo. Todos los NOISE_PATTERNS van entre \b…\b; se saca ese
+# \b común fuera de la alternancia para que a mitad de palabra el motor
+# descarte el grupo entero sin probar cada patrón. El texto llega ya en
+# minúsculas, por eso no hace falta re.IGNORECASE.
+# Los símbolos se quitan en esta misma pasada: hacerlo aparte con
+# str.translate no resultó más rápido (el coste está en la alternancia).
+# Paréntesis y corchetes con cuantificador acotado: un "(" sin cerrar no
+# obliga a recorrer el resto del texto desde cada posición.
+_FUSED_NOISE_RE = re.compile(
+    r"\([^)]{0,200}\)"
+    r"|\[[^\]]{0,200}\]"
+    r"|\b(?:" + "|".join(p[2:-2] for p in NOISE_PATTERNS) + r")\b"
+    r"|[^a-z0-9\s]"
+)
 
 # Ranking de calidad de audio (mayor número = mejor calidad)
 QUALITY_RANK = {
@@ -81,15 +149,21 @@ QUALITY_LABEL = {
 }
 
 # ── Patrones de detección de variantes ────────────────────────────────────────
-# Cada patrón devuelve True si el texto del track/álbum contiene ese rasgo.
-_RE_REMASTER = re.compile(r"\b(?:remaster(?:ed)?|digital remaster)\b", re.I)
-_RE_EXPLICIT = re.compile(r"\bexplicit\b", re.I)
-_RE_CLEAN = re.compile(r"\bclean\b", re.I)
-_RE_STEREO = re.compile(r"\bstereo\b", re.I)
-_RE_MONO = re.compile(r"\bmono\b", re.I)
-_RE_ALBUM_VER = re.compile(r"\balbum version\b", re.I)
-_RE_SINGLE_VER = re.compile(r"\bsingle version\b", re.I)
-_RE_YEAR = re.compile(r"\b(19|20)(\d{2})\b")
+# Un solo patrón con un grupo con nombre por rasgo: _version_features() recorre
+# el texto del track/álbum una vez con finditer() y anota qué rasgos aparecen.
+_RE_FEATURES = re.compile(
+    r"\b(?:"
+    r"(?P<remaster>remaster(?:ed)?|digital remaster)"
+    r"|(?P<explicit>explicit)"
+    r"|(?P<clean>clean)"
+    r"|(?P<stereo>stereo)"
+    r"|(?P<mono>mono)"
+    r"|(?P<album_ver>album version)"
+    r"|(?P<single_ver>single version)"
+    r"|(?P<year>(?:19|20)\d{2})"
+    r")\b",
+    re.I,
+)
 
 
 def _tag(track) -> str:
@@ -99,73 +173,92 @@ def _tag(track) -> str:
     return f"{title} {album}"
 
 
-def _remaster_year(track) -> int:
-    """
-    Extrae el año del remaster (p.ej. 'Remastered 2011' → 2011).
-    Si no hay año devuelve 0 (remaster sin año = más antiguo).
-    """
-    tag = _tag(track)
-    if not _RE_REMASTER.search(tag):
-        return -1  # no es remaster
-    m = _RE_YEAR.search(tag)
-    return int(m.group(0)) if m else 0
-
-
-def version_priority(track) -> tuple:
+def _version_features(tag: str) -> tuple:
     """
-    Tupla de criterios de desempate (todos descendentes: mayor = mejor).
-
-    Orden de prioridad cuando la calidad de audio es igual:
+    Criterios de desempate 1–4 a partir del tag título+álbum (todos
+    descendentes: mayor = mejor). Orden de prioridad cuando la calidad de
+    audio es igual:
       1. Remaster reciente > remaster antiguo > sin remaster
       2. Explicit > Clean
       3. Stereo > Mono
       4. Album version > Single version
-      5. ID más bajo (original histórico en Tidal)
+    El 5.º criterio, ID más bajo, lo añade _keeper_sort_key().
     """
-    tag = _tag(track)
+    found = set()
+    year = 0
+    for m in _RE_FEATURES.finditer(tag):
+        if m.lastgroup == "year":
+            year = year or int(m.group())  # el primer año del texto
+        else:
+            found.add(m.lastgroup)
 
     # 1. Remaster: año del remaster (−1 si no es remaster, 0 si año desconocido)
-    remaster_score = _remaster_year(track)
+    remaster_score = year if "remaster" in found else -1
 
     # 2. Explicit (1) > Clean (0) — si es clean penaliza
-    explicit_score = (
-        1 if _RE_EXPLICIT.search(tag) else (0 if not _RE_CLEAN.search(tag) else -1)
-    )
+    explicit_score = 1 if "explicit" in found else (0 if "clean" not in found else -1)
 
     # 3. Stereo (1) > sin indicación (0) > Mono (-1)
-    if _RE_STEREO.search(tag):
+    if "stereo" in found:
         stereo_score = 1
-    elif _RE_MONO.search(tag):
+    elif "mono" in found:
         stereo_score = -1
     else:
         stereo_score = 0
 
     # 4. Album version (1) > sin indicación (0) > Single version (-1)
-    if _RE_ALBUM_VER.search(tag):
+    if "album_ver" in found:
         album_score = 1
-    elif _RE_SINGLE_VER.search(tag):
+    elif "single_ver" in found:
         album_score = -1
     else:
         album_score = 0
 
-    # 5. ID menor = más antiguo/original en Tidal (valor positivo: menor ID es mejor)
-    id_score = getattr(track, "id", 0)
-
-    return (remaster_score, explicit_score, stereo_score, album_score, id_score)
+    return (remaster_score, explicit_score, stereo_score, album_score)
 
 
 def get_quality(track) -> str:
-    """Devuelve el string de calidad del track (normalizado a mayúsculas)."""
-    q = getattr(track, "audio_quality", None)
-    if q is None:
-        return "UNKNOWN"
-    return (q.value if hasattr(q, "value") else str(q)).upper()
+    """
+    Devuelve el string de calidad del track (normalizado a mayúsculas).
+    Se calcula una vez y queda guardado en el propio track.
+    """
+    try:
+        return track._cached_quality
+    except AttributeError:
+        pass
+    q = track.audio_quality  # _parse_track_safe garantiza que existe
+    quality = "UNKNOWN" if q is None else (q.value if hasattr(q, "value") else str(q))
+    track._cached_quality = quality = quality.upper()
+    return quality
 
 
 def quality_rank(track) -> int:
     return QUALITY_RANK.get(get_quality(track), 0)
 
 
+def qlabel(track) -> str:
+    """Etiqueta legible de la calidad del track (memoizada en el track)."""
+    try:
+        return track._cached_qlabel
+    except AttributeError:
+        pass
+    q = get_quality(track)
+    track._cached_qlabel = label = QUALITY_LABEL.get(q, q)
+    return label
+
+
+def track_label(track) -> str:
+    """'Artista - Título' del track (memoizado en el track)."""
+    try:
+        return track._cached_label
+    except AttributeError:
+        pass
+    label = f"{track.artist.name} - {track.name}" if track.artist else track.name
+    track._cached_label = label
+    return label
+
+
+@lru_cache(maxsize=200_000)
 def normalize(text: str) -> str:
     """
     Normaliza texto para comparación minuciosa:
@@ -174,15 +267,53 @@ def normalize(text: str) -> str:
     - Elimina palabras de 'ruido' (Remastered, Anniversary, Live, etc.)
     - Elimina años y números de edición
     - Elimina símbolos, deja solo letras y números
+
+    Memoizada: el mismo artista aparece decenas de veces en una biblioteca.
+    La caché dura lo que dura el proceso (se reutiliza entre rondas).
     """
     text = text.lower()
-    text = re.sub(r"\(.*?\)", " ", text)  # quita (contenido)
-    text = re.sub(r"\[.*?\]", " ", text)  # quita [contenido]
-    text = NOISE_RE.sub(" ", text)  # quita palabras de ruido
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    words = text.split()
+    # Atajo: solo letras ASCII y ninguna palabra de ruido → nada que quitar
+    if text.isascii() and "".join(words).isalpha() and _NOISE_WORDS.isdisjoint(words):
+        return " ".join(words)
+    text = _FUSED_NOISE_RE.sub(" ", text)
     return " ".join(text.split())
 
 
+class _Named:
+    """Artista o álbum mínimo de un track construido desde el JSON."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class _Track:
+    """
+    Track mínimo construido desde el JSON cuando tidalapi no puede parsearlo.
+    Con __slots__ no lleva un __dict__ por instancia.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "artist",
+        "album",
+        "audio_quality",
+        "_cached_quality",
+        "_cached_qlabel",
+        "_cached_label",
+    )
+
+    def __init__(self, id, name, artist, album, audio_quality):
+        self.id = id
+        self.name = name
+        self.artist = artist
+        self.album = album
+        self.audio_quality = audio_quality
+
+
 def _parse_track_safe(session, track_data):
     """
     Intenta parsear el track con tidalapi. Si falla (tracks con datos
@@ -190,63 +321,86 @@ def _parse_track_safe(session, track_data):
     directamente del JSON para no perder la canción.
     """
     try:
-        return session.parse_track(track_data)
+        track = session.parse_track(track_data)
     except Exception:
         pass
+    else:
+        track.audio_quality = getattr(track, "audio_quality", None)
+        return track
 
-    class _T:
-        pass
-
-    t = _T()
-    t.id = track_data.get("id")
-    t.name = track_data.get("title") or track_data.get("name") or "?"
     a = track_data.get("artist") or {}
-    t.artist = _T()
-    t.artist.name = (a.get("name") or "?") if isinstance(a, dict) else "?"
     alb = track_data.get("album") or {}
-    t.album = _T()
-    t.album.name = (
+    artist_name = (a.get("name") or "?") if isinstance(a, dict) else "?"
+    album_name = (
         (alb.get("title") or alb.get("name") or "?") if isinstance(alb, dict) else "?"
     )
-    t.audio_quality = track_data.get("audioQuality") or track_data.get("audio_quality")
-    return t
+    return _Track(
+        id=track_data.get("id"),
+        name=track_data.get("title") or track_data.get("name") or "?",
+        artist=_Named(artist_name),
+        album=_Named(album_name),
+        audio_quality=track_data.get("audioQuality") or track_data.get("audio_quality"),
+    )
+
+
+def _fetch_page(session, offset, limit):
+    """Descarga una página de My Tracks y devuelve el JSON decodificado."""
+    r = session.request.request(
+        "GET",
+        f"users/{session.user.id}/favorites/tracks",
+        params={
+            "limit": limit,
+            "offset": offset,
+            "order": "DATE",
+            "orderDirection": "DESC",
+            "countryCode": session.country_code,
+        },
+    )
+    return _json_loads(r.content)
 
 
 def get_all_tracks(session):
     """
-    Obtiene TODOS los tracks de My Tracks usando llamadas directas a la API
+    Genera TODOS los tracks de My Tracks usando llamadas directas a la API
     de Tidal con paginación explícita por offset.
 
+    Es un generador: cada track se entrega en cuanto llega su página, de modo
+    que find_duplicates() normaliza y agrupa mientras las demás páginas se
+    siguen descargando, sin materializar la lista completa.
+
+    La primera página se pide sola para conocer totalNumberOfItems; el resto
+    de offsets hasta ese total se piden en paralelo (FETCH_WORKERS hilos) y se
+    procesan en orden.
+
     Condición de parada: la API devuelve una página vacía (sin items), lo que
     indica que se agotaron todos los registros. No se confía en totalNumberOfItems
     ni en el tamaño de página para cortar el loop, ya que ambos pueden ser
-    menores al esperado sin significar el fin real de la lista.
+    menores al esperado sin significar el fin real de la lista: si la última
+    página del total aún trae items, se busca el final real más allá del total.
     """
-    all_tracks = []
     seen_ids = set()
     skipped_unavailable = 0  # tracks con item=null: eliminados del catálogo de Tidal
-    offset = 0
-    limit = 100
+    limit = PAGE_SIZE
     total_label = "?"
-    consecutive_empty = 0
-
-    while True:
-        try:
-            r = session.request.request(
-                "GET",
-                f"users/{session.user.id}/favorites/tracks",
-                params={
-                    "limit": limit,
-                    "offset": offset,
-                    "order": "DATE",
-                    "orderDirection": "DESC",
-                    "countryCode": session.country_code,
-                },
+    last_progress = 0.0
+    last_offset = 0
+
+    def progress(offset, force=False):
+        """Línea de progreso, como mucho 10 veces por segundo."""
+        nonlocal last_progress, last_offset
+        last_offset = offset
+        now = time.monotonic()
+        if force or now - last_progress >= 0.1:
+            last_progress = now
+            print(
+                f"  Descargados {len(seen_ids)}/{total_label} tracks (offset={offset})...",
+                end="\r",
+                flush=True,
             )
-            data = r.json()
-        except Exception as e:
-            print(f"\n  ❌ Error en paginación (offset={offset}): {e}")
-            break
+
+    def parse_page(data, offset):
+        """Devuelve los tracks nuevos de la página, o None si venía sin items."""
+        nonlocal total_label, skipped_unavailable
 
         raw_total = data.get("totalNumberOfItems")
         if raw_total is not None:
@@ -260,15 +414,9 @@ def get_all_tracks(session):
         # Solo las páginas sin items JSON cuentan como "vacías" reales.
         # Los fallos de parse no cortan el loop (pueden ser episodios, videos, etc.)
         if not items:
-            consecutive_empty += 1
-            if consecutive_empty >= 2:
-                break
-            offset += limit
-            continue
-
-        # Hay items en el JSON → resetear contador y procesar
-        consecutive_empty = 0
+            return None
 
+        page = []
         for item in items:
             track_data = item.get("item")
             if not track_data:
@@ -284,41 +432,352 @@ def get_all_tracks(session):
             if raw_q:
                 track.audio_quality = raw_q
             seen_ids.add(track_id)
-            all_tracks.append(track)
+            page.append(track)
 
-        print(
-            f"  Descargados {len(all_tracks)}/{total_label} tracks (offset={offset})...",
-            end="\r",
-            flush=True,
-        )
+        progress(offset)
+        return page
 
+    def limit_reached() -> bool:
         # Límite de seguridad absoluto (nunca leer más de MAX_TRACKS)
-        if len(all_tracks) >= MAX_TRACKS:
+        if len(seen_ids) >= MAX_TRACKS:
             print(f"\n  ⚠️  Límite de {MAX_TRACKS} canciones alcanzado.")
-            break
-
-        offset += limit
+            return True
+        return False
+
+    def fetch_pages(offsets, fetched):
+        """
+        Descarga en paralelo (FETCH_WORKERS hilos) las páginas de `offsets` que
+        no estén ya en `fetched` y entrega sus tracks en orden de offset.
+        Devuelve (seguir, última_página_vacía); seguir=False si hubo un error
+        o se alcanzó MAX_TRACKS.
+        """
+        last_empty = False
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            futures = {
+                page_offset: executor.submit(_fetch_page, session, page_offset, limit)
+                for page_offset in offsets
+                if page_offset not in fetched
+            }
+            try:
+                for page_offset in offsets:
+                    data = fetched.get(page_offset)
+                    if data is None:
+                        try:
+                            data = futures[page_offset].result()
+                        except Exception as e:
+                            print(f"\n  ❌ Error en paginación (offset={page_offset}): {e}")
+                            return False, last_empty
+                    page = parse_page(data, page_offset)
+                    last_empty = page is None
+                    yield from page or ()
+                    if limit_reached():
+                        return False, last_empty
+            finally:
+                # Si se cortó antes de tiempo (o el consumidor dejó de iterar),
+                # no esperar a las páginas pendientes
+                for future in futures.values():
+                    future.cancel()
+        return True, last_empty
+
+    def probe(offset):
+        """Pide una página suelta; devuelve (json, tiene_items) o None si falla."""
+        try:
+            data = _fetch_page(session, offset, limit)
+        except Exception as e:
+            print(f"\n  ❌ Error en paginación (offset={offset}): {e}")
+            return None
+        return data, bool(data.get("items"))
 
+    # ── Primera página: fija el total ─────────────────────────────
+    first = probe(0)
+    if first is None:
+        keep_going, last_empty = False, True
+    else:
+        keep_going, last_empty = yield from fetch_pages([0], {0: first[0]})
+
+    # ── Páginas restantes hasta el total, en paralelo ─────────────
+    offset = limit
+    if keep_going and not last_empty and isinstance(total_label, int):
+        window = range(offset, min(total_label, MAX_TRACKS), limit)
+        if window:
+            keep_going, last_empty = yield from fetch_pages(window, {})
+            offset = window[-1] + limit
+
+    # ── Cola: páginas más allá del total ──────────────────────────
+    # Si la última página ya vino vacía, la lista terminó. Si no, el total se
+    # quedó corto: se sondea con saltos exponenciales (1, 2, 4… páginas) hasta
+    # dar con una página vacía y se acota el final con búsqueda binaria. Las
+    # páginas intermedias se descargan después en paralelo.
+    if keep_going and not last_empty:
+        probed = {}
+        last_full = offset - limit  # última página conocida con items
+        first_empty = None
+        step = limit
+        while first_empty is None:
+            if last_full + limit >= MAX_TRACKS:
+                first_empty = last_full + limit  # no sondear más allá del límite
+                break
+            target = min(last_full + step, MAX_TRACKS)
+            result = probe(target)
+            if result is None:
+                first_empty = target  # error: no seguir más allá
+                keep_going = False
+                break
+            probed[target] = result[0]
+            if result[1]:
+                last_full = target
+                step *= 2
+            else:
+                first_empty = target
+        while keep_going and first_empty - last_full > limit:
+            mid = last_full + (first_empty - last_full) // limit // 2 * limit
+            result = probe(mid)
+            if result is None:
+                first_empty = mid
+                break
+            probed[mid] = result[0]
+            if result[1]:
+                last_full = mid
+            else:
+                first_empty = mid
+        yield from fetch_pages(range(offset, last_full + limit, limit), probed)
+
+    progress(last_offset, force=True)
     print()
+    print(f"  📋 {len(seen_ids)} canciones en My Tracks")
     if skipped_unavailable:
         print(
             f"  ℹ️  {skipped_unavailable} tracks con item=null: "
             f"eliminados del catálogo de Tidal o no disponibles en tu región"
         )
     if isinstance(total_label, int):
-        missing = total_label - len(all_tracks) - skipped_unavailable
+        missing = total_label - len(seen_ids) - skipped_unavailable
         if missing > 0:
             print(
                 f"  ℹ️  {missing} tracks que Tidal reporta en el total ({total_label}) "
                 f"no aparecieron en ninguna página de la API "
                 f"(borrados o restringidos por región)."
             )
-    return all_tracks
 
 
-def find_duplicates(tracks):
+# Versión de la lógica de normalize() / _version_features(). Súbela si cambia
+# su código (no los patrones: esos ya entran en la huella de la caché).
+_NORM_LOGIC_VERSION = 1
+
+
+def _norm_cache_version() -> str:
+    """
+    Huella de todo lo que determina las filas de _NormCache: si cambian los
+    patrones de ruido o de rasgos (o _NORM_LOGIC_VERSION), las filas guardadas
+    dejan de valer y se descartan.
+    """
+    parts = (
+        _NORM_LOGIC_VERSION,
+        _FUSED_NOISE_RE.pattern,
+        _RE_FEATURES.pattern,
+        _RE_FEATURES.flags,
+        sorted(_NOISE_WORDS),
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class _NormCache:
+    """
+    Caché de normalización por track_id, persistida en SQLite entre ejecuciones.
+
+    Guarda el artista/título/álbum originales junto a su forma normalizada y
+    los criterios de _version_features(); si alguno de los textos cambió, la
+    fila se recalcula. El archivo lleva la huella de _norm_cache_version(): si
+    no coincide (cambió la normalización) se vacía entero. Con path=None (o si
+    el archivo no se puede abrir) la caché vive solo en memoria.
+    """
+
+    def __init__(self, path=None):
+        self.rows = {}  # id → [artist, name, album, norm_artist, norm_title, feat…]
+        self._dirty = set()
+        self._seen = set()  # ids consultados en esta ejecución
+        self._conn = None
+        if path is None:
+            return
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+                )
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS tracks ("
+                    "id INTEGER PRIMARY KEY, artist TEXT, name TEXT, album TEXT, "
+                    "norm_artist TEXT, norm_title TEXT, "
+                    "remaster INTEGER, explicit INTEGER, stereo INTEGER, "
+                    "album_ver INTEGER)"
+                )
+                version = _norm_cache_version()
+                stored = self._conn.execute(
+                    "SELECT value FROM meta WHERE key = 'version'"
+                ).fetchone()
+                if stored is None or stored[0] != version:
+                    self._conn.execute("DELETE FROM tracks")
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,)
+                    )
+            for row in self._conn.execute("SELECT * FROM tracks"):
+                self.rows[row[0]] = list(row[1:])
+        except (sqlite3.Error, OSError) as e:
+            print(f"  ⚠️  Caché de normalización desactivada: {e}")
+            self.rows = {}
+            self._conn = None
+
+    def _row(self, track) -> list:
+        artist = track.artist.name if track.artist else "desconocido"
+        title = track.name or ""
+        album = (track.album.name if track.album else "") or ""
+        self._seen.add(track.id)
+        row = self.rows.get(track.id)
+        if row is None or row[:3] != [artist, title, album]:
+            row = [artist, title, album, normalize(artist), normalize(title)]
+            row += [None] * 4
+            self.rows[track.id] = row
+            self._dirty.add(track.id)
+        return row
+
+    def key(self, track) -> tuple:
+        """(artista normalizado, título normalizado)."""
+        row = self._row(track)
+        return (row[3], row[4])
+
+    def features(self, track) -> tuple:
+        """Criterios 1–4 de _version_features(), calculados una sola vez."""
+        row = self._row(track)
+        if row[5] is None:
+            row[5:] = _version_features(_tag(track))
+            self._dirty.add(track.id)
+        return tuple(row[5:])
+
+    def save(self):
+        """Escribe en disco las filas nuevas o recalculadas."""
+        if self._conn is None or not self._dirty:
+            return
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO tracks VALUES (?,?,?,?,?,?,?,?,?,?)",
+                    [(i, *self.rows[i]) for i in self._dirty],
+                )
+            self._dirty.clear()
+        except sqlite3.Error as e:
+            print(f"  ⚠️  No se pudo guardar la caché de normalización: {e}")
+
+    def prune(self):
+        """
+        Borra las filas de tracks que no aparecieron en esta ejecución (ya no
+        están en My Tracks), para que el archivo no crezca sin límite. Llamar
+        tras un escaneo completo de la biblioteca.
+        """
+        stale = self.rows.keys() - self._seen
+        if not stale:
+            return
+        for track_id in stale:
+            del self.rows[track_id]
+        self._dirty -= stale
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM tracks WHERE id = ?", [(i,) for i in stale]
+                )
+        except sqlite3.Error as e:
+            print(f"  ⚠️  No se pudo limpiar la caché de normalización: {e}")
+
+
+def _keeper_sort_key(track, features) -> tuple:
+    """
+    Clave de ordenación de un grupo de duplicados (el mejor queda primero):
+      0. Mayor calidad de audio
+      1–4. `features`: los criterios de _version_features() para el track
+      5. ID más bajo (original histórico en Tidal)
+    """
+    qr = quality_rank(track)
+    # (remaster_year, explicit, stereo, album) y el id: todos "mayor = mejor"
+    # salvo el id; negamos para que sort() los ordene descendente
+    return (-qr, -features[0], -features[1], -features[2], -features[3], track.id)
+
+
+_RE_DIGITS = re.compile(r"\d+")
+
+
+def _similar_titles(titles) -> list:
+    """
+    Agrupa los títulos normalizados de un mismo artista que están a pocas
+    ediciones de distancia (Levenshtein). Para no comparar todos contra todos,
+    solo se comparan títulos que comparten algún trigrama y cuya longitud
+    difiere como mucho en la distancia admitida. Títulos con números distintos
+    ("piano sonata no 14" / "no 15") nunca se unen.
+    Devuelve listas de títulos con más de un elemento.
+    """
+    parent = {}
+
+    def root(title):
+        while parent[title] != title:
+            parent[title] = parent[parent[title]]
+            title = parent[title]
+        return title
+
+    by_trigram = {}
+    numbers = {}
+    for title in titles:
+        if len(title) < FUZZY_MIN_LENGTH:
+            continue
+        parent[title] = title
+        numbers[title] = _RE_DIGITS.findall(title)
+        trigrams = {title[i : i + 3] for i in range(len(title) - 2)}
+        candidates = set()
+        for trigram in trigrams:
+            candidates.update(by_trigram.get(trigram, ()))
+        for other in candidates:
+            max_dist = max(1, min(len(title), len(other)) // 10)
+            if abs(len(title) - len(other)) > max_dist:
+                continue
+            if numbers[title] != numbers[other]:
+                continue
+            if Levenshtein.distance(title, other, score_cutoff=max_dist) <= max_dist:
+                parent[root(other)] = root(title)
+        for trigram in trigrams:
+            by_trigram.setdefault(trigram, []).append(title)
+
+    components = {}
+    for title in parent:
+        components.setdefault(root(title), []).append(title)
+    return [c for c in components.values() if len(c) > 1]
+
+
+def _merge_similar(first_seen, duplicates):
+    """
+    Une en `duplicates` las claves de un mismo artista cuyos títulos son casi
+    iguales (--fuzzy), incluidas las que hasta ahora tenían un solo track.
+    """
+    by_artist = {}
+    for artist, title in first_seen:
+        by_artist.setdefault(artist, []).append(title)
+
+    for artist, titles in by_artist.items():
+        if len(titles) < 2:
+            continue
+        for similar in _similar_titles(titles):
+            group = []
+            for title in similar:
+                key = (artist, title)
+                group.extend(duplicates.pop(key, None) or [first_seen[key]])
+            duplicates[(artist, similar[0])] = group
+
+
+def find_duplicates(tracks, cache=None, fuzzy=False):
     """
     Agrupa tracks por (artista normalizado, título normalizado).
+    Acepta cualquier iterable (p.ej. el generador de get_all_tracks) y agrupa
+    a medida que van llegando los tracks.
 
     Criterio de ordenación dentro de cada grupo (descendente = mejor primero):
       1. Calidad de audio (HI_RES_LOSSLESS > HI_RES > LOSSLESS > HIGH > LOW)
@@ -330,50 +789,63 @@ def find_duplicates(tracks):
 
     group[0] siempre es el track que se conserva.
     Devuelve solo los grupos con más de un track.
+
+    `cache` (un _NormCache) evita recalcular la normalización de los tracks
+    ya vistos en rondas o ejecuciones anteriores. Con `fuzzy` también se
+    agrupan títulos casi iguales del mismo artista (requiere rapidfuzz).
     """
-    groups = defaultdict(list)
+    if cache is None:
+        cache = _NormCache()
+    first_seen = {}  # clave → primer track (la mayoría de claves no se repite)
+    duplicates = {}  # clave → lista, solo se crea al aparecer una segunda copia
 
     for track in tracks:
-        artist = track.artist.name if track.artist else "desconocido"
-        title = track.name or ""
-        key = (normalize(artist), normalize(title))
-        groups[key].append(track)
-
-    duplicates = {}
-    for k, v in groups.items():
-        if len(v) > 1:
-
-            def sort_key(t):
-                qr = quality_rank(t)
-                # version_priority devuelve (remaster_year, explicit, stereo, album, id)
-                # todos "mayor = mejor"; negamos para que sort() los ordene descendente
-                vp = version_priority(t)
-                return (-qr, -vp[0], -vp[1], -vp[2], -vp[3], vp[4])
-
-            v.sort(key=sort_key)
-            duplicates[k] = v
-
+        key = cache.key(track)
+        group = duplicates.get(key)
+        if group is not None:
+            group.append(track)
+        elif key in first_seen:
+            duplicates[key] = [first_seen[key], track]
+        else:
+            first_seen[key] = track
+
+    if fuzzy:
+        _merge_similar(first_seen, duplicates)
+
+    for group in duplicates.values():
+        group.sort(key=lambda t: _keeper_sort_key(t, cache.features(t)))
+
+    cache.save()
     return duplicates
 
 
-def remove_duplicates_round(session, round_num, all_removed, all_errors):
+def scan_round(session, round_num, cache=None, removed_ids=frozenset(), fuzzy=False):
     """
-    Ejecuta una pasada completa: descarga lista, detecta y elimina duplicados.
-    Devuelve cuántos eliminó en esta ronda.
+    Primera mitad de una ronda: descarga la lista y detecta duplicados.
+
+    Los ids de `removed_ids` (ya eliminados en rondas anteriores) se ignoran,
+    así que la lectura puede arrancar antes de que Tidal refleje los borrados.
+    Devuelve el dict de duplicados, o None si no se pudo leer My Tracks.
     """
     print(f"\n{'─' * 62}")
     print(f"  RONDA {round_num} — Leyendo My Tracks...")
     print(f"{'─' * 62}")
 
     try:
-        tracks = get_all_tracks(session)
-        print(f"  📋 {len(tracks)} canciones en My Tracks")
+        tracks = (t for t in get_all_tracks(session) if t.id not in removed_ids)
+        return find_duplicates(tracks, cache, fuzzy)
     except Exception as e:
         print(f"  ❌ Error al leer My Tracks: {e}")
-        return 0
+        return None
 
-    duplicates = find_duplicates(tracks)
 
+def remove_duplicates_round(
+    session, round_num, duplicates, all_removed, all_errors, removed_ids
+):
+    """
+    Segunda mitad de una ronda: elimina las copias detectadas por scan_round()
+    y anota sus ids en `removed_ids`. Devuelve cuántos eliminó.
+    """
     if not duplicates:
         return 0
 
@@ -382,43 +854,84 @@ def remove_duplicates_round(session, round_num, all_removed, all_errors):
         f"  ⚠️  {len(duplicates)} grupos duplicados detectados → {total} copias a eliminar\n"
     )
 
-    eliminated = 0
-    for (_, _), group in duplicates.items():
-        keeper = group[0]
-        extras = group[1:]
-        keeper_label = (
-            f"{keeper.artist.name} - {keeper.name}" if keeper.artist else keeper.name
-        )
-        keeper_q = QUALITY_LABEL.get(get_quality(keeper), get_quality(keeper))
+    jobs = [(track, group[0]) for group in duplicates.values() for track in group[1:]]
 
-        for track in extras:
-            t_label = (
-                f"{track.artist.name} - {track.name}" if track.artist else track.name
+    limiter = TokenBucket(DELETE_RATE, 1)
+
+    def _remove(track):
+        try:
+            call_api(limiter, session.user.favorites.remove_track, str(track.id))
+            return True, None
+        except Exception as e:
+            return False, e
+
+    eliminated = 0
+    futures = {}
+    unreported = set()
+
+    def report(future):
+        """Imprime y registra el resultado de una eliminación terminada."""
+        nonlocal eliminated
+        track, keeper = futures[future]
+        ok, err = future.result()
+        t_label = track_label(track)
+        t_q = qlabel(track)
+        print(f"  ✗ {t_label[:48]} [{t_q}]", end=" ... ")
+        if ok:
+            print("✅", flush=True)
+            removed_ids.add(track.id)
+            all_removed.append(
+                f"[Ronda {round_num}] ELIMINADA: {t_label} [{t_q}]"
+                f"  →  CONSERVADA: {track_label(keeper)} [{qlabel(keeper)}]"
             )
-            t_q = QUALITY_LABEL.get(get_quality(track), get_quality(track))
-            print(f"  ✗ {t_label[:48]} [{t_q}]", end=" ... ", flush=True)
-            try:
-                session.user.favorites.remove_track(track.id)
-                print("✅")
-                all_removed.append(
-                    f"[Ronda {round_num}] ELIMINADA: {t_label} [{t_q}]"
-                    f"  →  CONSERVADA: {keeper_label} [{keeper_q}]"
-                )
-                eliminated += 1
-            except Exception as e:
-                print(f"⚠️  Error: {e}")
-                all_errors.append(f"{t_label}: {e}")
-            time.sleep(RATE_LIMIT_DELAY)
+            eliminated += 1
+        else:
+            print(f"⚠️  Error: {err}", flush=True)
+            all_errors.append(f"{t_label}: {err}")
+        unreported.discard(future)
+
+    executor = ThreadPoolExecutor(max_workers=DELETE_WORKERS)
+    try:
+        futures = {executor.submit(_remove, job[0]): job for job in jobs}
+        unreported.update(futures)
+        # Los resultados se imprimen (y registran) desde el hilo principal
+        for future in as_completed(futures):
+            report(future)
+    finally:
+        # Con Ctrl+C no seguir borrando: se cancelan las eliminaciones en cola,
+        # se espera solo a las que ya estaban en marcha y esas se registran.
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for future in list(unreported):
+            if not future.cancelled():
+                report(future)
 
     return eliminated
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Limpiador de duplicados en Tidal My Tracks"
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="tratar como duplicados títulos casi iguales del mismo artista "
+        "(p.ej. \"Don't Stop Me Now\" / \"Dont Stop Me Now\"); requiere rapidfuzz",
+    )
+    args = parser.parse_args()
+
     if tidalapi is None:
         print("❌ tidalapi no está instalado.")
         print("   Ejecuta en tu terminal:  pip install tidalapi")
         return
 
+    if args.fuzzy and Levenshtein is None:
+        print("⚠️  --fuzzy necesita rapidfuzz; se usará solo la comparación exacta.")
+        print("   Para activarlo ejecuta:  pip install rapidfuzz")
+        args.fuzzy = False
+
     print("=" * 62)
     print("    Limpiador de Duplicados en Tidal My Tracks")
     print("=" * 62)
@@ -432,16 +945,17 @@ def main():
         print(f"❌ No se pudo conectar: {e}")
         return
     print("✅ Sesión iniciada correctamente")
+    tune_http_session(session)
 
     # ── 2. Vista previa rápida y confirmación ─────────────────────
     print("\n[2/3] Escaneando para mostrar una vista previa...")
+    cache = _NormCache(NORM_CACHE_PATH)
     try:
-        tracks = get_all_tracks(session)
+        duplicates = find_duplicates(get_all_tracks(session), cache, args.fuzzy)
     except Exception as e:
         print(f"❌ Error: {e}")
         return
-
-    duplicates = find_duplicates(tracks)
+    cache.prune()  # acaba de recorrerse la biblioteca entera
 
     if not duplicates:
         print("✅ ¡No hay duplicados! Tu lista ya está limpia.")
@@ -454,17 +968,16 @@ def main():
     print("  Vista previa (primeros 10 grupos):")
     for (_, _), group in list(duplicates.items())[:10]:
         keeper = group[0]
-        keeper_label = (
-            f"{keeper.artist.name} - {keeper.name}" if keeper.artist else keeper.name
-        )
-        keeper_q = QUALITY_LABEL.get(get_quality(keeper), get_quality(keeper))
         keeper_album = keeper.album.name if keeper.album else "?"
-        print(f"  ✓ Conservar : {keeper_label}  [{keeper_q}]  (álbum: {keeper_album})")
+        print(
+            f"  ✓ Conservar : {track_label(keeper)}  [{qlabel(keeper)}]"
+            f"  (álbum: {keeper_album})"
+        )
         for t in group[1:]:
-            t_label = f"{t.artist.name} - {t.name}" if t.artist else t.name
-            t_q = QUALITY_LABEL.get(get_quality(t), get_quality(t))
             t_album = t.album.name if t.album else "?"
-            print(f"  ✗ Eliminar  : {t_label}  [{t_q}]  (álbum: {t_album})")
+            print(
+                f"  ✗ Eliminar  : {track_label(t)}  [{qlabel(t)}]  (álbum: {t_album})"
+            )
         print()
 
     if len(duplicates) > 10:
@@ -486,25 +999,43 @@ def main():
 
     all_removed = []
     all_errors = []
+    removed_ids = set()
     round_num = 1
+    duplicates = scan_round(session, round_num, cache, removed_ids, args.fuzzy)
 
-    while True:
-        eliminated = remove_duplicates_round(
-            session, round_num, all_removed, all_errors
-        )
+    # La lectura de la ronda siguiente se lanza en segundo plano en cuanto
+    # terminan los borrados, y corre durante la espera de 3 segundos.
+    # Con Ctrl+C se para sin lanzar más eliminaciones y se pasa al resumen,
+    # para que lo ya eliminado quede en el log.
+    interrupted = False
+    try:
+        with ThreadPoolExecutor(max_workers=1) as scanner:
+            while True:
+                eliminated = remove_duplicates_round(
+                    session, round_num, duplicates, all_removed, all_errors, removed_ids
+                )
 
-        if eliminated == 0:
-            print(
-                f"\n  ✅ Ronda {round_num}: sin duplicados detectados. ¡Lista limpia!"
-            )
-            break
+                if eliminated == 0:
+                    print(
+                        f"\n  ✅ Ronda {round_num}: sin duplicados detectados."
+                        " ¡Lista limpia!"
+                    )
+                    break
 
-        print(
-            f"\n  ✅ Ronda {round_num} completada: {eliminated} duplicados eliminados."
-        )
-        print("     Esperando 3 segundos para que Tidal actualice la lista...")
-        time.sleep(3)
-        round_num += 1
+                print(
+                    f"\n  ✅ Ronda {round_num} completada: "
+                    f"{eliminated} duplicados eliminados."
+                )
+                print("     Esperando 3 segundos para que Tidal actualice la lista...")
+                round_num += 1
+                next_scan = scanner.submit(
+                    scan_round, session, round_num, cache, removed_ids, args.fuzzy
+                )
+                time.sleep(3)
+                duplicates = next_scan.result()
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n\n  ⛔ Interrumpido: no se eliminará nada más.")
 
     # ── Resumen final ─────────────────────────────────────────────
     print("\n" + "=" * 62)
@@ -519,12 +1050,15 @@ def main():
             logs_dir = Path(__file__).parent.parent / "logs"
             logs_dir.mkdir(exist_ok=True)
             with open(logs_dir / LOG_ELIMINADOS, "a", encoding="utf-8") as f:
-                f.write("\n".join(all_removed) + "\n")
+                f.writelines(f"{line}\n" for line in all_removed)
             print(f"\n  💾 Log guardado en: logs/{LOG_ELIMINADOS}")
         except Exception:
             pass
 
-    print("\n✅ ¡Tu My Tracks está completamente limpio!")
+    if interrupted:
+        print("\n⚠️  Limpieza incompleta: vuelve a ejecutar el script para terminarla.")
+    else:
+        print("\n✅ ¡Tu My Tracks está completamente limpio!")
 
 
 if __name__ == "__main__":
@@ -17,7 +17,12 @@ USO:
 
 import re
 import time
-from collections import defaultdict
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from tidal_http import TokenBucket, call_api, prefetch, tune_http_session
 
 try:
     import tidalapi
@@ -26,12 +31,31 @@ except ImportError:
 
 # ── Configuración ─────────────────────────────────────────────────────────────
 
-# Pausa entre llamadas a la API (segundos)
+# Pausa mínima entre búsquedas en el catálogo (segundos), contando las de
+# todos los hilos. Sube a 1.0 si ves errores de rate limit.
 RATE_LIMIT_DELAY = 0.5
 
-# Pausa extra después de agregar/eliminar un track
+# Ritmo máximo de búsquedas, en peticiones por segundo, compartido por todos
+# los hilos. Por defecto 1 / RATE_LIMIT_DELAY (2/s): el mismo techo que hacer
+# una búsqueda tras otra. Puedes subirlo (p. ej. a 8) si tu cuenta lo tolera;
+# los reintentos ante un 429 frenan igualmente a todos los hilos.
+SEARCH_RATE = 1 / RATE_LIMIT_DELAY
+
+# Búsquedas simultáneas en el catálogo. Los hilos solo solapan la latencia de
+# red: el ritmo lo marca SEARCH_RATE, no el número de hilos.
+SEARCH_WORKERS = 8
+
+# Páginas de My Tracks que se descargan en paralelo una vez conocido el total
+FETCH_WORKERS = 8
+
+# Pausa extra después de agregar/eliminar un lote de tracks
 MODIFY_DELAY = 1.0
 
+# Mejoras cuyas versiones mejores se agregan en una sola petición (las
+# eliminaciones van una a una). Como mucho 100: tras agregarlas se comprueba
+# que aparezcan en la primera página de My Tracks, que trae 100.
+MODIFY_BATCH = 50
+
 # Máximo de canciones a escanear de My Tracks.
 # Aumenta este valor si tu biblioteca supera el límite.
 MAX_TRACKS = 50_000
@@ -56,8 +80,11 @@ QUALITY_LABEL = {
     "LOW": "Low (96kbps)",
 }
 
+# Etiqueta → ranking, para ordenar la distribución de calidad por etiqueta
+LABEL_TO_RANK = {QUALITY_LABEL[k]: rank for k, rank in QUALITY_RANK.items()}
+
 # Calidades que ya son máximas: no tiene sentido buscar mejora
-TOP_QUALITIES = {"HI_RES_LOSSLESS", "HI_RES"}
+TOP_QUALITIES = frozenset({"HI_RES_LOSSLESS", "HI_RES"})
 
 # Patrones de ruido para normalizar títulos al comparar resultados de búsqueda
 NOISE_PATTERNS = [
@@ -85,15 +112,37 @@ NOISE_PATTERNS = [
 
 NOISE_RE = re.compile("|".join(NOISE_PATTERNS), re.IGNORECASE)
 
+# Cuantificador acotado: un "(" sin cerrar no obliga a recorrer el resto del
+# texto en cada posición (un título normal nunca lleva 200 caracteres entre
+# paréntesis).
+_PAREN_RE = re.compile(r"\([^)]{0,200}\)")
+_BRACKET_RE = re.compile(r"\[[^\]]{0,200}\]")
+_NONALNUM_RE = re.compile(r"[^a-z0-9\s]")
+
+# Misma limpieza que _NONALNUM_RE para texto ASCII, con bytes.translate: una
+# consulta a la tabla por byte, más del doble de rápido que la regex.
+_ASCII_CLEAN = bytes(
+    c if chr(c) in "abcdefghijklmnopqrstuvwxyz0123456789" or chr(c).isspace() else 32
+    for c in range(256)
+)
+
 
 # ── Utilidades ────────────────────────────────────────────────────────────────
 
 
 def get_quality(track) -> str:
+    """
+    Devuelve el string de calidad del track (normalizado a mayúsculas).
+    Se calcula una vez y queda guardado en el propio track.
+    """
+    try:
+        return track._cached_quality
+    except AttributeError:
+        pass
     q = getattr(track, "audio_quality", None)
-    if q is None:
-        return "UNKNOWN"
-    return (q.value if hasattr(q, "value") else str(q)).upper()
+    quality = "UNKNOWN" if q is None else (q.value if hasattr(q, "value") else str(q))
+    track._cached_quality = quality = quality.upper()
+    return quality
 
 
 def quality_rank(track) -> int:
@@ -101,27 +150,91 @@ def quality_rank(track) -> int:
 
 
 def qlabel(track) -> str:
-    return QUALITY_LABEL.get(get_quality(track), get_quality(track))
+    """Etiqueta legible de la calidad del track (memoizada en el track)."""
+    try:
+        return track._cached_qlabel
+    except AttributeError:
+        pass
+    q = get_quality(track)
+    track._cached_qlabel = label = QUALITY_LABEL.get(q, q)
+    return label
 
 
+@lru_cache(maxsize=16_384)
 def normalize(text: str) -> str:
-    """Normaliza un texto para comparación: minúsculas, sin ruido, sin símbolos."""
+    """
+    Normaliza un texto para comparación: minúsculas, sin ruido, sin símbolos.
+    Memoizada: los candidatos de búsqueda repiten artista y título una y otra vez.
+    """
     text = text.lower()
-    text = re.sub(r"\(.*?\)", " ", text)
-    text = re.sub(r"\[.*?\]", " ", text)
+    text = _PAREN_RE.sub(" ", text)
+    text = _BRACKET_RE.sub(" ", text)
     text = NOISE_RE.sub(" ", text)
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    if text.isascii():
+        text = text.encode().translate(_ASCII_CLEAN).decode()
+    else:
+        text = _NONALNUM_RE.sub(" ", text)
     return " ".join(text.split())
 
 
+def search_query(artist: str, title: str) -> str:
+    """
+    Texto de búsqueda canónico: minúsculas y espacios colapsados, de modo que
+    variantes triviales del mismo artista/título piden la misma URL y
+    aprovechan la caché del CDN de Tidal. No pasa por normalize(): quitaría
+    acentos y letras no latinas, y con ellas la canción que se busca.
+    """
+    return " ".join(f"{artist} {title}".lower().split())
+
+
 def track_label(track) -> str:
+    """'Artista - Título' del track (memoizado en el track)."""
+    try:
+        return track._cached_label
+    except AttributeError:
+        pass
     artist = track.artist.name if track.artist else "?"
-    return f"{artist} - {track.name}"
+    track._cached_label = label = f"{artist} - {track.name}"
+    return label
 
 
 # ── Paginación completa de My Tracks ─────────────────────────────────────────
 
 
+class _Named:
+    """Artista o álbum mínimo de un track construido desde el JSON."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class _Track:
+    """
+    Track mínimo construido desde el JSON cuando tidalapi no puede parsearlo.
+    Con __slots__ no lleva un __dict__ por instancia.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "artist",
+        "album",
+        "audio_quality",
+        "_cached_quality",
+        "_cached_qlabel",
+        "_cached_label",
+    )
+
+    def __init__(self, id, name, artist, album, audio_quality):
+        self.id = id
+        self.name = name
+        self.artist = artist
+        self.album = album
+        self.audio_quality = audio_quality
+
+
 def _parse_track_safe(session, track_data):
     """
     Intenta parsear el track con tidalapi. Si falla (tracks con datos
@@ -133,28 +246,46 @@ def _parse_track_safe(session, track_data):
     except Exception:
         pass
 
-    class _T:
-        pass
-
-    t = _T()
-    t.id = track_data.get("id")
-    t.name = track_data.get("title") or track_data.get("name") or "?"
     a = track_data.get("artist") or {}
-    t.artist = _T()
-    t.artist.name = (a.get("name") or "?") if isinstance(a, dict) else "?"
     alb = track_data.get("album") or {}
-    t.album = _T()
-    t.album.name = (
+    artist_name = (a.get("name") or "?") if isinstance(a, dict) else "?"
+    album_name = (
         (alb.get("title") or alb.get("name") or "?") if isinstance(alb, dict) else "?"
     )
-    t.audio_quality = track_data.get("audioQuality") or track_data.get("audio_quality")
-    return t
+    return _Track(
+        id=track_data.get("id"),
+        name=track_data.get("title") or track_data.get("name") or "?",
+        artist=_Named(artist_name),
+        album=_Named(album_name),
+        audio_quality=track_data.get("audioQuality") or track_data.get("audio_quality"),
+    )
+
+
+def _fetch_page(session, offset, limit):
+    """Descarga una página de My Tracks y devuelve el JSON decodificado."""
+    r = session.request.request(
+        "GET",
+        f"users/{session.user.id}/favorites/tracks",
+        params={
+            "limit": limit,
+            "offset": offset,
+            "order": "DATE",
+            "orderDirection": "DESC",
+            "countryCode": session.country_code,
+        },
+    )
+    return r.json()
 
 
 def get_all_tracks(session):
     """
     Descarga todos los tracks de My Tracks con paginación robusta.
     Para cuando la API devuelve dos páginas vacías consecutivas.
+
+    La primera página se pide sola para conocer totalNumberOfItems; las demás
+    hasta ese total se piden por adelantado en paralelo (FETCH_WORKERS hilos)
+    y se procesan en orden de offset. Más allá del total se sigue página a
+    página como antes.
     """
     all_tracks = []
     seen_ids = set()
@@ -163,77 +294,101 @@ def get_all_tracks(session):
     limit = 100
     total_label = "?"
     consecutive_empty = 0
+    pending = {}  # offset -> Future de las páginas pedidas por adelantado
+    scheduled = False
+    last_progress = 0.0
+    last_offset = 0  # última página con items
 
-    while True:
-        try:
-            r = session.request.request(
-                "GET",
-                f"users/{session.user.id}/favorites/tracks",
-                params={
-                    "limit": limit,
-                    "offset": offset,
-                    "order": "DATE",
-                    "orderDirection": "DESC",
-                    "countryCode": session.country_code,
-                },
-            )
-            data = r.json()
-        except Exception as e:
-            print(f"\n  ❌ Error en paginación (offset={offset}): {e}")
-            break
+    def progress(end="\r"):
+        print(
+            f"  Descargados {len(all_tracks)}/{total_label} tracks (offset={last_offset})...",
+            end=end,
+            flush=True,
+        )
 
-        raw_total = data.get("totalNumberOfItems")
-        if raw_total is not None:
+    executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+    try:
+        while True:
             try:
-                total_label = int(raw_total)
-            except (ValueError, TypeError):
-                pass
-
-        items = data.get("items", [])
-
-        # Solo las páginas sin items JSON cuentan como "vacías" reales.
-        # Los fallos de parse no cortan el loop (pueden ser episodios, videos, etc.)
-        if not items:
-            consecutive_empty += 1
-            if consecutive_empty >= 2:
+                future = pending.pop(offset, None)
+                if future is not None:
+                    data = future.result()
+                else:
+                    data = _fetch_page(session, offset, limit)
+            except Exception as e:
+                print(f"\n  ❌ Error en paginación (offset={offset}): {e}")
                 break
-            offset += limit
-            continue
-
-        # Hay items en el JSON → resetear contador y procesar
-        consecutive_empty = 0
 
-        for item in items:
-            track_data = item.get("item")
-            if not track_data:
-                skipped_unavailable += 1  # sin datos: track eliminado del catálogo
-                continue
-            track_id = track_data.get("id")
-            if not track_id or track_id in seen_ids:
+            raw_total = data.get("totalNumberOfItems")
+            if raw_total is not None:
+                try:
+                    total_label = int(raw_total)
+                except (ValueError, TypeError):
+                    pass
+
+            # Con el total ya conocido, pedir el resto de páginas en paralelo
+            if not scheduled and isinstance(total_label, int):
+                scheduled = True
+                end = min(total_label, MAX_TRACKS)
+                for page_offset in range(offset + limit, end, limit):
+                    pending[page_offset] = executor.submit(
+                        _fetch_page, session, page_offset, limit
+                    )
+
+            items = data.get("items", [])
+
+            # Solo las páginas sin items JSON cuentan como "vacías" reales.
+            # Los fallos de parse no cortan el loop (pueden ser episodios, videos, etc.)
+            if not items:
+                consecutive_empty += 1
+                if consecutive_empty >= 2:
+                    break
+                offset += limit
                 continue
-            track = _parse_track_safe(session, track_data)
-            if track.id is None:
-                continue
-            raw_q = track_data.get("audioQuality") or track_data.get("audio_quality")
-            if raw_q:
-                track.audio_quality = raw_q
-            seen_ids.add(track_id)
-            all_tracks.append(track)
-
-        print(
-            f"  Descargados {len(all_tracks)}/{total_label} tracks (offset={offset})...",
-            end="\r",
-            flush=True,
-        )
 
-        # Límite de seguridad absoluto (nunca leer más de MAX_TRACKS)
-        if len(all_tracks) >= MAX_TRACKS:
-            print(f"\n  ⚠️  Límite de {MAX_TRACKS} canciones alcanzado.")
-            break
+            # Hay items en el JSON → resetear contador y procesar
+            consecutive_empty = 0
+
+            for item in items:
+                track_data = item.get("item")
+                if not track_data:
+                    skipped_unavailable += 1  # sin datos: track eliminado del catálogo
+                    continue
+                track_id = track_data.get("id")
+                if not track_id or track_id in seen_ids:
+                    continue
+                track = _parse_track_safe(session, track_data)
+                if track.id is None:
+                    continue
+                raw_q = track_data.get("audioQuality") or track_data.get(
+                    "audio_quality"
+                )
+                if raw_q:
+                    track.audio_quality = raw_q
+                seen_ids.add(track_id)
+                all_tracks.append(track)
+
+            # Como mucho 10 líneas de progreso por segundo: cada print con
+            # flush es una escritura en la terminal, lenta en Windows o en CI
+            last_offset = offset
+            now = time.monotonic()
+            if now - last_progress >= 0.1:
+                last_progress = now
+                progress()
+
+            # Límite de seguridad absoluto (nunca leer más de MAX_TRACKS)
+            if len(all_tracks) >= MAX_TRACKS:
+                print(f"\n  ⚠️  Límite de {MAX_TRACKS} canciones alcanzado.")
+                break
 
-        offset += limit
+            offset += limit
+    finally:
+        # Si se cortó antes de tiempo, no esperar a las páginas pendientes
+        for future in pending.values():
+            future.cancel()
+        executor.shutdown(wait=True)
 
-    print()
+    progress(end="\n")
     if skipped_unavailable:
         print(
             f"  ℹ️  {skipped_unavailable} tracks con item=null: "
@@ -253,7 +408,7 @@ def get_all_tracks(session):
 # ── Búsqueda de versión de mayor calidad ─────────────────────────────────────
 
 
-def search_better_version(session, track):
+def search_better_version(session, track, limiter):
     """
     Busca en el catálogo de Tidal una versión del mismo track con calidad superior.
 
@@ -269,12 +424,14 @@ def search_better_version(session, track):
     title = track.name or ""
     current_rank = quality_rank(track)
 
-    query = f"{artist_name} {title}"
+    query = search_query(artist_name, title)
     norm_artist = normalize(artist_name)
     norm_title = normalize(title)
 
     try:
-        results = session.search(query, models=[tidalapi.Track], limit=20)
+        results = call_api(
+            limiter, session.search, query, models=[tidalapi.Track], limit=20
+        )
         candidates = (
             results.get("tracks", [])
             if isinstance(results, dict)
@@ -308,68 +465,159 @@ def search_better_version(session, track):
     return best
 
 
+def _add_favorites(session, limiter, ids):
+    """
+    Agrega varios tracks a My Tracks en una sola petición: el mismo POST que
+    Favorites.add_track() de tidalapi, con los ids separados por comas en
+    `trackId` (`trackIds` es el campo de las playlists).
+    """
+    call_api(
+        limiter,
+        session.request.request,
+        "POST",
+        f"users/{session.user.id}/favorites/tracks",
+        data={"trackId": ",".join(map(str, ids))},
+    )
+
+
+def _recent_favorite_ids(session, limiter) -> set:
+    """IDs de los 100 tracks agregados más recientemente a My Tracks."""
+    data = call_api(limiter, _fetch_page, session, 0, 100)
+    return {
+        (item.get("item") or {}).get("id") for item in data.get("items") or []
+    }
+
+
 # ── Proceso principal ─────────────────────────────────────────────────────────
 
 
-def process_tracks(session, tracks, log_entries, errors):
+def process_tracks(session, tracks, log, errors):
     """
     Recorre los tracks, detecta cuáles tienen versión de mayor calidad disponible
     y realiza el upgrade (agregar mejor + eliminar peor).
 
-    Devuelve el número de tracks mejorados.
+    Cada mejora se escribe en `log` (archivo abierto) en cuanto se completa.
+    Devuelve (tracks mejorados, tracks omitidos por tener ya calidad máxima).
     """
     improved = 0
     skipped_top = 0
     total = len(tracks)
+    limiter = TokenBucket(SEARCH_RATE, 1)
+    library_ids = {track.id for track in tracks}
 
-    for i, track in enumerate(tracks, 1):
-        label = track_label(track)
-        current_q = get_quality(track)
-        current_ql = qlabel(track)
-
-        print(f"  [{i}/{total}] {label[:55]}  [{current_ql}]", end="  ", flush=True)
-
-        # Si ya es la calidad máxima, no hay nada que buscar
-        if current_q in TOP_QUALITIES:
-            print("— ya es máxima calidad, omitiendo")
-            skipped_top += 1
-            continue
-
-        better = search_better_version(session, track)
-        time.sleep(RATE_LIMIT_DELAY)
-
-        if better is None:
-            print("— sin mejora disponible")
-            continue
-
-        better_ql = qlabel(better)
-        print(f"→ mejora encontrada [{better_ql}]", end="  ", flush=True)
+    def search(track):
+        if get_quality(track) in TOP_QUALITIES:
+            return None
+        return search_better_version(session, track, limiter)
 
-        # 1. Agregar la versión de mayor calidad
+    def present_ids():
+        """IDs que hay ahora mismo en My Tracks, hasta donde se puede saber."""
         try:
-            session.user.favorites.add_track(better.id)
-            time.sleep(MODIFY_DELAY)
+            return library_ids | _recent_favorite_ids(session, limiter)
         except Exception as e:
-            print(f"⚠️  Error al agregar: {e}")
-            errors.append(f"ADD FAIL | {label} → [{better_ql}]: {e}")
-            continue
-
-        # 2. Eliminar la versión de menor calidad
+            print(f"    ⚠️  No se pudo comprobar My Tracks: {e}")
+            return library_ids
+
+    def apply_upgrades(batch):
+        """
+        Aplica un lote de mejoras [(track, mejor, label, calidad, calidad mejor)]:
+        una petición agrega todas las versiones mejores y las que no aparezcan
+        después en My Tracks se agregan track a track. Un original solo se
+        elimina si su versión mejor está confirmada en My Tracks: una respuesta
+        2xx sola no basta.
+        """
+        nonlocal improved
+        print(f"  💾 Aplicando {len(batch)} mejora(s)...", flush=True)
+
+        # 1. Agregar las versiones de mayor calidad y confirmar que están
+        better_ids = list(dict.fromkeys(better.id for _, better, *_ in batch))
         try:
-            session.user.favorites.remove_track(track.id)
-            time.sleep(MODIFY_DELAY)
-            print("✅")
-            log_entries.append(
+            _add_favorites(session, limiter, better_ids)
+        except Exception as e:
+            print(f"    ⚠️  Falló el alta en lote, se reintenta track a track: {e}")
+        present = present_ids()
+        failed = {}
+        for better_id in better_ids:
+            if better_id in present:
+                continue
+            try:
+                call_api(limiter, session.user.favorites.add_track, str(better_id))
+            except Exception as e:
+                failed[better_id] = e
+        if not present.issuperset(better_ids):
+            present = present_ids()
+        time.sleep(MODIFY_DELAY)
+
+        added = []
+        for upgrade in batch:
+            _, better, label, _, better_ql = upgrade
+            if better.id in present:
+                added.append(upgrade)
+                library_ids.add(better.id)
+                continue
+            reason = failed.get(better.id, "no aparece en My Tracks tras agregarla")
+            print(f"    ⚠️  Error al agregar {label}: {reason}")
+            errors.append(f"ADD FAIL | {label} → [{better_ql}]: {reason}")
+
+        # 2. Eliminar las versiones de menor calidad
+        if not added:
+            return
+        removed = []
+        for upgrade in added:
+            track, _, label, _, _ = upgrade
+            try:
+                call_api(limiter, session.user.favorites.remove_track, str(track.id))
+                removed.append(upgrade)
+                library_ids.discard(track.id)
+            except Exception as e:
+                print(f"    ⚠️  Error al eliminar original {label}: {e}")
+                errors.append(f"REMOVE FAIL | {label}: {e}")
+                # La mejor versión ya se agregó; el original queda como
+                # duplicado (el script de duplicados puede limpiarlo después)
+        time.sleep(MODIFY_DELAY)
+
+        for track, better, label, current_ql, better_ql in removed:
+            log.write(
                 f"MEJORADA: {label}\n"
                 f"  Antes : [{current_ql}]  ID={track.id}\n"
-                f"  Ahora : [{better_ql}]   ID={better.id}  ({better.name})"
+                f"  Ahora : [{better_ql}]   ID={better.id}  ({better.name})\n\n"
             )
-            improved += 1
-        except Exception as e:
-            print(f"⚠️  Error al eliminar original: {e}")
-            errors.append(f"REMOVE FAIL | {label}: {e}")
-            # La mejor versión ya se agregó; el original queda como duplicado
-            # (el script de duplicados puede limpiarlo después)
+        improved += len(removed)
+        print(f"  ✅ {len(removed)}/{len(batch)} mejorada(s)")
+
+    # Las búsquedas (solo lectura) corren en paralelo por delante del bucle;
+    # las mejoras se acumulan y se aplican por lotes desde el hilo principal.
+    pending = []
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        results = prefetch(executor, search, tracks, SEARCH_WORKERS * 4)
+        for i, (track, better) in enumerate(results, 1):
+            label = track_label(track)
+            current_q = get_quality(track)
+            current_ql = qlabel(track)
+
+            print(
+                f"  [{i}/{total}] {label[:55]}  [{current_ql}]", end="  ", flush=True
+            )
+
+            # Si ya es la calidad máxima, no hay nada que buscar
+            if current_q in TOP_QUALITIES:
+                print("— ya es máxima calidad, omitiendo")
+                skipped_top += 1
+                continue
+
+            if better is None:
+                print("— sin mejora disponible")
+                continue
+
+            better_ql = qlabel(better)
+            print(f"→ mejora encontrada [{better_ql}]")
+            pending.append((track, better, label, current_ql, better_ql))
+            if len(pending) >= MODIFY_BATCH:
+                apply_upgrades(pending)
+                pending = []
+
+    if pending:
+        apply_upgrades(pending)
 
     return improved, skipped_top
 
@@ -396,6 +644,7 @@ def main():
         print(f"❌ No se pudo conectar: {e}")
         return
     print("✅ Sesión iniciada correctamente")
+    tune_http_session(session)
 
     # ── 2. Descargar My Tracks ────────────────────────────────────
     print("\n[2/4] Descargando tu lista completa de My Tracks...")
@@ -408,18 +657,13 @@ def main():
 
     # ── 3. Vista previa de distribución de calidad ────────────────
     print("\n[3/4] Distribución de calidad actual:")
-    quality_dist: dict[str, int] = defaultdict(int)
-    for t in tracks:
-        quality_dist[qlabel(t)] += 1
+    quality_dist = Counter(map(qlabel, tracks))
     for ql, count in sorted(
-        quality_dist.items(),
-        key=lambda x: -QUALITY_RANK.get(
-            next((k for k, v in QUALITY_LABEL.items() if v == x[0]), ""), 0
-        ),
+        quality_dist.items(), key=lambda x: -LABEL_TO_RANK.get(x[0], 0)
     ):
         print(f"       {ql:<22} : {count} canciones")
 
-    already_top = sum(1 for t in tracks if get_quality(t) in TOP_QUALITIES)
+    already_top = sum(map(TOP_QUALITIES.__contains__, map(get_quality, tracks)))
     upgradeable = len(tracks) - already_top
     print(f"\n  ℹ️  {already_top} ya en calidad máxima (se omitirán)")
     print(f"  🔍 {upgradeable} canciones a verificar en el catálogo\n")
@@ -437,10 +681,14 @@ def main():
 
     # ── 4. Procesar tracks ────────────────────────────────────────
     print("\n[4/4] Procesando canciones...\n")
-    log_entries = []
     errors = []
 
-    improved, skipped_top = process_tracks(session, tracks, log_entries, errors)
+    # El log se escribe a medida que avanza: un corte no pierde las mejoras hechas
+    logs_dir = Path(__file__).parent.parent / "logs"  # carpeta hermana de core/
+    logs_dir.mkdir(exist_ok=True)
+    log_path = logs_dir / LOG_MEJORADAS
+    with open(log_path, "a", encoding="utf-8", buffering=1 << 16) as log:
+        improved, skipped_top = process_tracks(session, tracks, log, errors)
 
     # ── Resumen final ─────────────────────────────────────────────
     print("\n" + "=" * 62)
@@ -451,15 +699,8 @@ def main():
     print(f"  ✅ Mejoradas             : {improved}")
     print(f"  ⚠️  Errores              : {len(errors)}")
 
-    if log_entries:
-        try:
-            logs_dir = Path(__file__).parent.parent / "logs"
-            logs_dir.mkdir(exist_ok=True)
-            with open(logs_dir / LOG_MEJORADAS, "a", encoding="utf-8") as f:
-                f.write("\n\n".join(log_entries) + "\n")
-            print(f"\n  💾 Log guardado en: logs/{LOG_MEJORADAS}")
-        except Exception:
-            pass
+    if improved:
+        print(f"\n  💾 Log guardado en: logs/{LOG_MEJORADAS}")
 
     if errors:
         print("\n  Errores detallados:")
@@ -19,10 +19,16 @@ USO:
 
 import os
 import re
+import threading
 import time
 import json
+from contextlib import ExitStack
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+from tidal_http import TokenBucket, call_api, prefetch, tune_http_session
+
 try:
     import tidalapi
 except ImportError:
@@ -39,9 +45,23 @@ except ImportError:
 
 MUSIC_DIR = os.environ.get("TIDAL_MUSIC_DIR", r"")
 
-# Pausa entre búsquedas (segundos). Sube a 1.0 si ves errores de rate limit.
+# Pausa mínima entre búsquedas en el catálogo (segundos), contando las de
+# todos los hilos. Sube a 1.0 si ves errores de rate limit.
 RATE_LIMIT_DELAY = 0.5
 
+# Ritmo máximo de búsquedas, en peticiones por segundo, compartido por todos
+# los hilos. Por defecto 1 / RATE_LIMIT_DELAY (2/s): el mismo techo que hacer
+# una búsqueda tras otra. Puedes subirlo (p. ej. a 8) si tu cuenta lo tolera;
+# los reintentos ante un 429 frenan igualmente a todos los hilos.
+SEARCH_RATE = 1 / RATE_LIMIT_DELAY
+
+# Búsquedas simultáneas en el catálogo. Los hilos solo solapan la latencia de
+# red: el ritmo lo marca SEARCH_RATE, no el número de hilos.
+SEARCH_WORKERS = 8
+
+# Páginas de favoritos que se descargan en paralelo una vez conocido el total
+FETCH_WORKERS = 8
+
 # Máximo de canciones a leer de My Tracks en Tidal (para verificar existencia).
 # Aumenta este valor si tu biblioteca supera el límite.
 MAX_TRACKS = 50_000
@@ -51,10 +71,29 @@ LOG_AGREGADAS = "tidal_agregadas.txt"
 LOG_NO_ENCONTRADAS = "tidal_no_encontradas.txt"
 LOG_YA_EXISTIAN = "tidal_ya_existian.txt"
 
+# Caché de búsquedas resueltas (texto de búsqueda → track de Tidal).
+# Permite relanzar el script tras un corte sin repetir las búsquedas que ya
+# encontraron su canción. Bórrala para forzar búsquedas nuevas.
+SEARCH_CACHE_PATH = Path.home() / ".cache" / "tidal-sync" / "search_cache.json"
+
 # ================================================================
 
 AUDIO_EXTENSIONS = {".flac", ".mp3", ".wav", ".m4a", ".ogg", ".aac", ".opus"}
 
+# Cuantificador acotado: un "(" sin cerrar no obliga a recorrer el resto del
+# texto en cada posición (un título normal nunca lleva 200 caracteres entre
+# paréntesis).
+_PAREN_RE = re.compile(r"\([^)]{0,200}\)")
+_BRACKET_RE = re.compile(r"\[[^\]]{0,200}\]")
+_NONALNUM_RE = re.compile(r"[^a-z0-9\s]")
+
+# Misma limpieza que _NONALNUM_RE para texto ASCII, con bytes.translate: una
+# consulta a la tabla por byte, más del doble de rápido que la regex.
+_ASCII_CLEAN = bytes(
+    c if chr(c) in "abcdefghijklmnopqrstuvwxyz0123456789" or chr(c).isspace() else 32
+    for c in range(256)
+)
+
 
 def get_songs_from_folder(music_dir: str) -> list[tuple[str, str, str]]:
     """
@@ -69,25 +108,35 @@ def get_songs_from_folder(music_dir: str) -> list[tuple[str, str, str]]:
         print("   Edita el script y asegúrate de que MUSIC_DIR sea correcto.")
         return songs
 
-    for artist_folder in sorted(music_path.iterdir()):
+    # os.scandir: el tipo de cada entrada viene del propio listado del
+    # directorio, sin un stat ni un objeto Path por archivo. Se ordena como
+    # ordenaba Path (sin distinguir mayúsculas en Windows).
+    with os.scandir(music_path) as it:
+        artist_folders = sorted(it, key=lambda e: os.path.normcase(e.name))
+
+    for artist_folder in artist_folders:
         if not artist_folder.is_dir():
             continue
         if artist_folder.name in ("Sin clasificar", "__pycache__"):
             continue
 
+        with os.scandir(artist_folder.path) as it:
+            names = sorted((e.name for e in it if e.is_file()), key=os.path.normcase)
+
         skipped_format = []
-        for song_file in sorted(artist_folder.iterdir()):
-            if song_file.suffix.lower() not in AUDIO_EXTENSIONS:
+        for name in names:
+            dot = name.rfind(".")
+            if dot <= 0 or name[dot:].lower() not in AUDIO_EXTENSIONS:
                 continue
 
-            stem = song_file.stem  # nombre sin extensión
+            stem = name[:dot]  # nombre sin extensión
             if " - " in stem:
                 parts = stem.split(" - ", 1)
                 artist = parts[0].strip()
                 title = parts[1].strip()
-                songs.append((artist, title, song_file.name))
+                songs.append((artist, title, name))
             else:
-                skipped_format.append(song_file.name)
+                skipped_format.append(name)
 
         if skipped_format:
             print(
@@ -102,49 +151,196 @@ def get_songs_from_folder(music_dir: str) -> list[tuple[str, str, str]]:
     return songs
 
 
+@lru_cache(maxsize=16_384)
 def normalize(text: str) -> str:
-    """Normaliza texto para comparación."""
+    """Normaliza texto para comparación (memoizada: los artistas se repiten)."""
     text = text.lower()
-    text = re.sub(r"\(.*?\)", "", text)  # quita paréntesis y contenido
-    text = re.sub(r"\[.*?\]", "", text)  # quita corchetes
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    text = _PAREN_RE.sub("", text)  # quita paréntesis y contenido
+    text = _BRACKET_RE.sub("", text)  # quita corchetes
+    if text.isascii():
+        text = text.encode().translate(_ASCII_CLEAN).decode()
+    else:
+        text = _NONALNUM_RE.sub(" ", text)
     return " ".join(text.split())
 
 
+def search_query(artist: str, title: str) -> str:
+    """
+    Texto de búsqueda canónico: minúsculas y espacios colapsados, de modo que
+    variantes triviales del mismo artista/título piden la misma URL y
+    aprovechan la caché del CDN de Tidal. No pasa por normalize(): quitaría
+    acentos y letras no latinas, y con ellas la canción que se busca.
+    """
+    return " ".join(f"{artist} {title}".lower().split())
+
+
 def find_best_match(results_tracks, artist: str, title: str):
-    """Elige el track de Tidal que mejor corresponde al artista y título locales."""
+    """
+    Elige el track de Tidal que mejor corresponde al artista y título locales.
+    Primero busca una coincidencia exacta (normalizada) entre los 10 primeros
+    resultados; si no la hay, acepta el primero en que uno contenga al otro.
+    """
     artist_norm = normalize(artist)
     title_norm = normalize(title)
 
+    candidates = []
     for track in results_tracks[:10]:
-        tidal_artist = track.artist.name if track.artist else ""
-        tidal_title = track.name or ""
-
-        ta = normalize(tidal_artist)
-        tt = normalize(tidal_title)
+        ta = normalize(track.artist.name if track.artist else "")
+        tt = normalize(track.name or "")
+        if ta == artist_norm and tt == title_norm:
+            return track
+        candidates.append((track, ta, tt))
 
-        # Match exacto o contenido
+    # Match contenido
+    for track, ta, tt in candidates:
         artist_match = (artist_norm in ta) or (ta in artist_norm)
         title_match = (title_norm in tt) or (tt in title_norm)
 
         if artist_match and title_match:
             return track
 
-    # Sin match exacto → no agregar para evitar canciones incorrectas
+    # Sin match → no agregar para evitar canciones incorrectas
     return None
 
 
-def search_track(session, artist: str, title: str):
-    """Busca un track en Tidal y devuelve el mejor match o None."""
-    query = f"{artist} {title}"
+def search_track(session, artist: str, title: str, limiter):
+    """
+    Busca un track en Tidal y devuelve (mejor match o None, mensaje de error
+    o None). No imprime nada: puede correr en un hilo del pool de búsquedas.
+    """
+    query = search_query(artist, title)
     try:
-        results = session.search(query, models=[tidalapi.Track], limit=20)
+        results = call_api(
+            limiter, session.search, query, models=[tidalapi.Track], limit=20
+        )
         tracks = results.get("tracks", [])
         if tracks:
-            return find_best_match(tracks, artist, title)
+            return find_best_match(tracks, artist, title), None
     except Exception as e:
-        print(f"\n  ⚠️  Error buscando '{query}': {e}")
-    return None
+        return None, f"Error buscando '{query}': {e}"
+    return None, None
+
+
+class _Named:
+    """Artista mínimo de un track recuperado de la caché de búsquedas."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class _CachedTrack:
+    """Lo que main() necesita de un track de Tidal: id, título y artista."""
+
+    __slots__ = ("id", "name", "artist")
+
+    def __init__(self, id, name, artist):
+        self.id = id
+        self.name = name
+        self.artist = _Named(artist) if artist is not None else None
+
+
+# Formato del archivo de caché. Súbelo si cambia la clave: los archivos con
+# otra versión se ignoran (y se reescriben al guardar).
+_SEARCH_CACHE_VERSION = 2
+
+
+class _SearchCache:
+    """
+    Resultados de search_track() por texto de búsqueda (search_query()): la
+    misma clave que la URL pedida, así que no se confunden títulos en otros
+    alfabetos ni "Song" con "Song (Live)".
+
+    En memoria se guarda una promesa (Future) por clave: si dos hilos del pool
+    buscan la misma canción a la vez, solo uno llama a la API y el otro espera
+    su resultado. Los aciertos se persisten en JSON entre ejecuciones; los
+    errores no se memorizan y se reintentan. Con path=None (o si el archivo no
+    se puede leer) la caché vive solo en memoria.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._memo = {}  # clave → Future con (track o None, error o None)
+        self._saved = {}  # clave → {"id", "name", "artist"}
+        self._dirty = False
+        if path is None:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == _SEARCH_CACHE_VERSION:
+                self._saved = data["entries"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            print(f"  ⚠️  Caché de búsquedas ignorada: {e}")
+
+    def search(self, artist: str, title: str, fetch):
+        """Devuelve el resultado memorizado o llama a fetch() una sola vez."""
+        key = search_query(artist, title)
+        with self._lock:
+            future = self._memo.get(key)
+            owner = future is None
+            if owner:
+                saved = self._saved.get(key)
+                if saved is not None:
+                    return _CachedTrack(**saved), None
+                future = self._memo[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            track, error = result = fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._memo[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if error:
+                del self._memo[key]
+            elif track is not None:
+                artist = track.artist.name if track.artist else None
+                self._saved[key] = {
+                    "id": track.id,
+                    "name": track.name,
+                    "artist": artist,
+                }
+                self._dirty = True
+        future.set_result(result)
+        return result
+
+    def save(self):
+        """Escribe en disco los aciertos (reemplazo atómico del archivo)."""
+        if self.path is None or not self._dirty:
+            return
+        try:
+            path = Path(self.path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                data = {"version": _SEARCH_CACHE_VERSION, "entries": self._saved}
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._dirty = False
+        except OSError as e:
+            print(f"  ⚠️  No se pudo guardar la caché de búsquedas: {e}")
+
+
+def _fetch_page(session, offset, limit):
+    """Descarga una página de favoritos y devuelve el JSON decodificado."""
+    r = session.request.request(
+        "GET",
+        f"users/{session.user.id}/favorites/tracks",
+        params={
+            "limit": limit,
+            "offset": offset,
+            "countryCode": session.country_code,
+        },
+    )
+    return r.json()
 
 
 def main():
@@ -179,32 +375,48 @@ def main():
         print(f"❌ No se pudo conectar: {e}")
         return
     print(f"✅ Sesión iniciada correctamente")
+    tune_http_session(session)
 
     # ── 2. Favoritos actuales (paginación completa) ───────────────
     print("\n[2/4] Leyendo tu My Tracks actual en Tidal...")
+    # La primera página fija el total; el resto hasta ese total se pide por
+    # adelantado en paralelo y se procesa en orden de offset.
+    executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+    pending = {}  # offset -> Future de las páginas pedidas por adelantado
     try:
         existing_ids = set()
         offset = 0
         limit = 100
         total_label = "?"
         consecutive_empty = 0
-        while True:
-            r = session.request.request(
-                "GET",
-                f"users/{session.user.id}/favorites/tracks",
-                params={
-                    "limit": limit,
-                    "offset": offset,
-                    "countryCode": session.country_code,
-                },
+        last_progress = 0.0
+        last_offset = 0  # última página con items
+
+        def progress(end="\r"):
+            print(
+                f"  Leyendo favoritos: {len(existing_ids)}/{total_label} (offset={last_offset})...",
+                end=end,
+                flush=True,
             )
-            data = r.json()
+
+        while True:
+            future = pending.pop(offset, None)
+            if future is not None:
+                data = future.result()
+            else:
+                data = _fetch_page(session, offset, limit)
             raw_total = data.get("totalNumberOfItems")
             if raw_total is not None:
                 try:
                     total_label = int(raw_total)
                 except (ValueError, TypeError):
                     pass
+            if offset == 0 and isinstance(total_label, int):
+                end = min(total_label, MAX_TRACKS)
+                for page_offset in range(limit, end, limit):
+                    pending[page_offset] = executor.submit(
+                        _fetch_page, session, page_offset, limit
+                    )
             items = data.get("items", [])
             # Solo las páginas sin items JSON cuentan como "vacías" reales.
             if not items:
@@ -219,20 +431,27 @@ def main():
                 track_data = item.get("item")
                 if track_data:
                     existing_ids.add(track_data.get("id"))
-            print(
-                f"  Leyendo favoritos: {len(existing_ids)}/{total_label} (offset={offset})...",
-                end="\r",
-                flush=True,
-            )
+            # Como mucho 10 líneas de progreso por segundo: cada print con
+            # flush es una escritura en la terminal, lenta en Windows o en CI
+            last_offset = offset
+            now = time.monotonic()
+            if now - last_progress >= 0.1:
+                last_progress = now
+                progress()
             if len(existing_ids) >= MAX_TRACKS:
                 print(f"\n  ⚠️  Límite de {MAX_TRACKS} canciones alcanzado.")
                 break
             offset += limit
-        print()
+        progress(end="\n")
         print(f"✅ Tienes {len(existing_ids)} canciones en My Tracks")
     except Exception as e:
         print(f"⚠️  No se pudieron obtener favoritos: {e}")
         existing_ids = set()
+    finally:
+        # Si se cortó antes de tiempo, no esperar a las páginas pendientes
+        for future in pending.values():
+            future.cancel()
+        executor.shutdown(wait=True)
 
     # ── 3. Leer archivos locales ──────────────────────────────────
     print(f"\n[3/4] Leyendo canciones de:\n  {MUSIC_DIR}")
@@ -245,68 +464,89 @@ def main():
     # ── 4. Buscar y agregar ───────────────────────────────────────
     print(f"\n[4/4] Buscando en Tidal y agregando a My Tracks...\n")
 
-    added = []
-    not_found = []
-    already_exists = []
-    errors = []
-
-    for i, (artist, title, filename) in enumerate(songs, 1):
-        label = f"{artist} - {title}"
-        print(f"[{i:>4}/{len(songs)}] {label[:60]:<60}", end=" ", flush=True)
-
-        track = search_track(session, artist, title)
-
-        if track is None:
-            print("❌ No encontrada")
-            not_found.append(label)
-
-        elif track.id in existing_ids:
-            print("✓  Ya existe")
-            already_exists.append(label)
-
-        else:
-            try:
-                session.user.favorites.add_track(track.id)
-                existing_ids.add(track.id)
-                tidal_label = (
-                    f"{track.artist.name} - {track.name}"
-                    if track.artist
-                    else track.name
-                )
-                print(f"➕ Agregada  [{tidal_label[:45]}]")
-                added.append(f"{label}  →  {tidal_label}")
-            except Exception as e:
-                print(f"⚠️  Error: {e}")
-                errors.append(f"{label}: {e}")
-
-        time.sleep(RATE_LIMIT_DELAY)
+    # Cada resultado se escribe en su log en cuanto se conoce: la memoria no
+    # crece con el número de canciones y un corte no pierde lo ya procesado.
+    logs_dir = Path(__file__).parent.parent / "logs"  # carpeta hermana de core/
+    logs_dir.mkdir(exist_ok=True)
+
+    added = 0
+    not_found = 0
+    already_exists = 0
+    errors = 0
+
+    limiter = TokenBucket(SEARCH_RATE, 1)
+    cache = _SearchCache(SEARCH_CACHE_PATH)
+
+    def search(song):
+        artist, title, _ = song
+
+        def fetch():
+            return search_track(session, artist, title, limiter)
+
+        return cache.search(artist, title, fetch)
+
+    def open_log(name):
+        return open(logs_dir / name, "a", encoding="utf-8", buffering=1 << 16)
+
+    # Al salir (también con Ctrl+C): se para el pool, se vuelcan y cierran los
+    # logs y se guarda la caché de búsquedas.
+    with ExitStack() as stack:
+        stack.callback(cache.save)
+        log_added = stack.enter_context(open_log(LOG_AGREGADAS))
+        log_not_found = stack.enter_context(open_log(LOG_NO_ENCONTRADAS))
+        log_exists = stack.enter_context(open_log(LOG_YA_EXISTIAN))
+        executor = stack.enter_context(ThreadPoolExecutor(max_workers=SEARCH_WORKERS))
+
+        # Las búsquedas (solo lectura) corren en paralelo por delante del bucle;
+        # las altas en My Tracks siguen siendo secuenciales, en el hilo principal.
+        results = prefetch(executor, search, songs, SEARCH_WORKERS * 4)
+        for i, ((artist, title, filename), (track, error)) in enumerate(results, 1):
+            label = f"{artist} - {title}"
+            print(f"[{i:>4}/{len(songs)}] {label[:60]:<60}", end=" ", flush=True)
+
+            if error:
+                print(f"\n  ⚠️  {error}")
+
+            if track is None:
+                print("❌ No encontrada")
+                log_not_found.write(label + "\n")
+                not_found += 1
+
+            elif track.id in existing_ids:
+                print("✓  Ya existe")
+                log_exists.write(label + "\n")
+                already_exists += 1
+
+            else:
+                try:
+                    call_api(limiter, session.user.favorites.add_track, track.id)
+                    existing_ids.add(track.id)
+                    tidal_label = (
+                        f"{track.artist.name} - {track.name}"
+                        if track.artist
+                        else track.name
+                    )
+                    print(f"➕ Agregada  [{tidal_label[:45]}]")
+                    log_added.write(f"{label}  →  {tidal_label}\n")
+                    added += 1
+                except Exception as e:
+                    print(f"⚠️  Error: {e}")
+                    errors += 1
 
     # ── Resumen ───────────────────────────────────────────────────
     print("\n" + "=" * 62)
     print("  RESUMEN FINAL")
     print("=" * 62)
-    print(f"  ➕ Canciones nuevas agregadas a My Tracks : {len(added)}")
-    print(f"  ✓  Ya existían en My Tracks               : {len(already_exists)}")
-    print(f"  ❌ No encontradas en catálogo de Tidal     : {len(not_found)}")
-    print(f"  ⚠️  Errores                                : {len(errors)}")
-
-    # Guardar logs en logs/ (carpeta hermana de core/)
-    script_dir = Path(__file__).parent.parent / "logs"
-    script_dir.mkdir(exist_ok=True)
+    print(f"  ➕ Canciones nuevas agregadas a My Tracks : {added}")
+    print(f"  ✓  Ya existían en My Tracks               : {already_exists}")
+    print(f"  ❌ No encontradas en catálogo de Tidal     : {not_found}")
+    print(f"  ⚠️  Errores                                : {errors}")
 
     if added:
-        with open(script_dir / LOG_AGREGADAS, "a", encoding="utf-8") as f:
-            f.write("\n".join(added) + "\n")
         print(f"\n  💾 Canciones agregadas  → {LOG_AGREGADAS}")
-
     if not_found:
-        with open(script_dir / LOG_NO_ENCONTRADAS, "a", encoding="utf-8") as f:
-            f.write("\n".join(not_found) + "\n")
         print(f"  💾 No encontradas       → {LOG_NO_ENCONTRADAS}")
-
     if already_exists:
-        with open(script_dir / LOG_YA_EXISTIAN, "a", encoding="utf-8") as f:
-            f.write("\n".join(already_exists) + "\n")
         print(f"  💾 Ya existían          → {LOG_YA_EXISTIAN}")
 
     print("\n✅ ¡Proceso completado!")
@@ -0,0 +1,156 @@
+"""
+Utilidades compartidas por los scripts de core/ para hablar con la API de
+Tidal desde varios hilos: limitador de ritmo, reintentos ante 429, pool de
+conexiones HTTP y prefetch ordenado sobre un ThreadPoolExecutor.
+
+Los scripts se ejecutan como `python core/<script>.py`, así que core/ está en
+sys.path y basta con `from tidal_http import ...`.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+try:
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    HTTPAdapter = Retry = None
+
+try:
+    from tidalapi.exceptions import TooManyRequests
+except ImportError:  # sin tidalapi: ninguna excepción es un TooManyRequests
+    TooManyRequests = ()
+
+# ── Configuración ─────────────────────────────────────────────────────────────
+
+# Reintentos ante un 429 (demasiadas peticiones). Se espera lo que indique
+# Retry-After o, si no viene, BACKOFF_BASE · 2^intento segundos (con jitter).
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+
+# Conexiones keep-alive reutilizables por los hilos que comparten la sesión
+HTTP_POOL_SIZE = 16
+
+
+# ── Utilidades ────────────────────────────────────────────────────────────────
+
+
+class TokenBucket:
+    """
+    Limitador compartido entre hilos (token bucket): se rellena a `rate`
+    permisos por segundo y acumula como mucho `burst`, de modo que tras una
+    pausa se pueden lanzar varias peticiones seguidas sin esperar. acquire()
+    solo bloquea cuando el cubo está vacío. pause() deja el cubo en deuda
+    para frenar a todos los hilos a la vez (p. ej. tras un 429).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Ningún hilo obtiene permiso hasta dentro de `seconds` segundos."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+def retry_after(e):
+    """
+    Si `e` es un 429 de Tidal devuelve los segundos de Retry-After (0 si no
+    vienen o no se entienden); para cualquier otro error devuelve None.
+
+    tidalapi convierte el 429 en un TooManyRequests vacío (sin respuesta ni
+    retry_after), lanzado mientras maneja el HTTPError de raise_for_status():
+    la respuesta con sus cabeceras queda en e.__context__.
+    """
+    response = getattr(e, "response", None)
+    if isinstance(e, TooManyRequests):
+        response = getattr(e.__context__, "response", None)
+    elif getattr(response, "status_code", None) != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def call_api(limiter, fn, *args, **kwargs):
+    """
+    Llama a fn(*args, **kwargs) tras pedir permiso al limitador. Ante un 429
+    pausa a todos los hilos lo que pida Retry-After (o un backoff exponencial
+    con jitter si no lo indica) y reintenta, hasta MAX_RETRIES veces.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            delay = retry_after(e)
+            if delay is None or attempt == MAX_RETRIES:
+                raise
+            backoff = BACKOFF_BASE * 2**attempt * random.uniform(1.0, 1.5)
+            limiter.pause(max(delay, backoff))
+
+
+def prefetch(executor, fn, items, ahead):
+    """
+    Ejecuta fn(item) en el pool con como mucho `ahead` llamadas adelantadas
+    y entrega (item, resultado) en el orden original de `items`.
+    """
+    items = iter(items)
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= ahead:
+            break
+    while pending:
+        item, future = pending.popleft()
+        for nxt in items:
+            pending.append((nxt, executor.submit(fn, nxt)))
+            break
+        yield item, future.result()
+def tune_http_session(session):
+    """
+    Monta en la sesión HTTP de tidalapi un pool de conexiones keep-alive del
+    tamaño de los hilos que la usan (por defecto requests guarda solo 10 y
+    las demás repiten el handshake TLS), con reintentos ante errores 5xx.
+    Los 429 no se reintentan aquí: llegan a call_api(), que pausa el
+    limitador compartido para frenar a todos los hilos a la vez.
+    """
+    http = getattr(session, "request_session", None)
+    if http is None:
+        return
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[500, 502, 503, 504],
+        raise_on_status=False,  # tras agotar reintentos, tidalapi ve la respuesta
+    )
+    http.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=8, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry
+        ),
+    )